@@ -1,64 +1,89 @@
-import numpy as np
 import time
-import matplotlib.pyplot as plt
+
+# numpy is only needed by the vectorized VectorPID below; the scalar
+# PIDController tick is pure Python floats end to end
+import numpy as np
+
 from params import PIDParams
+from kernels import vpid_update
 
 
 
 class PIDController:
     def __init__(self, params: PIDParams):
         self.params = params
+        # Gains promoted to direct attributes so the tick pays one
+        # LOAD_ATTR per gain instead of chasing through self.params
+        self.kp = params.kp
+        self.ki = params.ki
+        self.kd = params.kd
+        self.i_max = params.i_max
+        self.out_max = params.out_max
         self.integral = 0.0
         self.prev_error = 0.0
-        self.prev_time = None
+        self.prev_time_ns = None
         self.last_output = 0.0
-        
+        # dt-dependent coefficients, refreshed only when dt changes
+        self._cached_dt = None
+        self._bi = 0.0
+        self._bd = 0.0
+
     def reset(self):
         """Reset the integral and previous error"""
         self.integral = 0.0
         self.prev_error = 0.0
-        self.prev_time = None
+        self.prev_time_ns = None
         self.last_output = 0.0
-    
+
     def update(self, error: float, dt: float = None) -> float:
         """Update the PID controller with the given error and time step"""
-        current_time = time.time()
-        
-        # Calculate dt if not provided
+        # Calculate dt if not provided; only then is the clock consulted,
+        # so callers passing an explicit dt pay no clock syscall. The
+        # monotonic integer-ns counter avoids wall-clock jumps and the
+        # float precision loss of second-resolution timestamps
         if dt is None:
-            if self.prev_time is None:
-                self.prev_time = current_time
+            now_ns = time.perf_counter_ns()
+            if self.prev_time_ns is None:
+                self.prev_time_ns = now_ns
                 return 0.0
-            dt = current_time - self.prev_time
-            self.prev_time = current_time
-        
+            dt = (now_ns - self.prev_time_ns) * 1e-9
+            self.prev_time_ns = now_ns
+
         # Limit dt to reasonable bounds
         dt = max(min(dt, 0.1), 0.001)
-        
-        # Limit integral term
-        self.integral += error * dt
-        self.integral = np.clip(self.integral, 
-                                -self.params.i_max, 
-                                self.params.i_max)
-        
-        # Limit derivative kick
-        if dt > 1e-6:
-            derivative = (error - self.prev_error) / dt
-        else:
-            derivative = 0.0
-        
+
+        # Incremental form: fold dt into the integral/derivative gains once
+        # per dt change instead of re-deriving them every tick
+        if dt != self._cached_dt:
+            self._bi = self.ki * dt
+            self._bd = self.kd / dt
+            self._cached_dt = dt
+
+        # Limit integral term (already scaled by ki*dt, clamped to i_max)
+        integral = self.integral + self._bi * error
+        i_max = self.i_max
+        if integral > i_max:
+            integral = i_max
+        elif integral < -i_max:
+            integral = -i_max
+        self.integral = integral
+
         # Calculate PID output
-        output = (self.params.kp * error + 
-                 self.params.ki * self.integral + 
-                 self.params.kd * derivative)
-        
+        output = (self.kp * error +
+                  integral +
+                  self._bd * (error - self.prev_error))
+
         # Output limiting
-        output = np.clip(output, -self.params.out_max, self.params.out_max)
-        
+        out_max = self.out_max
+        if output > out_max:
+            output = out_max
+        elif output < -out_max:
+            output = -out_max
+
         # Update error and output
         self.prev_error = error
         self.last_output = output
-        
+
         return output
     
     def debug(self) -> dict:
@@ -67,3 +92,51 @@ class PIDController:
             'prev_err': self.prev_error,
             'output': self.last_output
         }
+
+
+class VectorPID:
+    """Vectorized PID controller that updates N independent axes in one pass.
+
+    Stores gains and state as length-N arrays so a full multi-axis update
+    costs a single set of NumPy ufunc calls instead of N Python-level ticks.
+    """
+    def __init__(self, kp, ki, kd, i_max, out_max):
+        self.kp = np.asarray(kp, dtype=np.float64)
+        self.ki = np.asarray(ki, dtype=np.float64)
+        self.kd = np.asarray(kd, dtype=np.float64)
+        self.i_max = np.asarray(i_max, dtype=np.float64)
+        self.out_max = np.asarray(out_max, dtype=np.float64)
+        self.integral = np.zeros_like(self.kp)
+        self.prev_error = np.zeros_like(self.kp)
+        self.last_output = np.zeros_like(self.kp)
+
+    def reset(self):
+        """Reset the integral and previous error on every axis"""
+        self.integral[:] = 0.0
+        self.prev_error[:] = 0.0
+        self.last_output[:] = 0.0
+
+    def update(self, errors: np.ndarray, dt: float) -> np.ndarray:
+        """Update all axes with the given error vector and time step"""
+        # Limit dt to reasonable bounds
+        dt = max(min(dt, 0.1), 0.001)
+
+        errors = np.asarray(errors, dtype=np.float64)
+
+        # The whole tick (saturated integral, derivative, clamped output)
+        # runs in one compiled kernel mutating the state buffers in place
+        vpid_update(self.kp, self.ki, self.kd, self.i_max, self.out_max,
+                    self.integral, self.prev_error, errors, dt,
+                    self.last_output)
+
+        return self.last_output
+
+
+# Optional AOT-compiled scalar PID (see controller_fast.pyx, built with
+# `python setup_fast.py build_ext --inplace`). When the extension is
+# available, PIDControllerC is a drop-in replacement for PIDController
+# with a mandatory dt argument.
+try:
+    from controller_fast import PIDControllerC
+except ImportError:
+    PIDControllerC = PIDController
@@ -0,0 +1,86 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""AOT-compiled drop-in for the PIDController hot tick.
+
+Build in place with:
+    python setup_fast.py build_ext --inplace
+
+controller.py picks the compiled class up automatically when present.
+"""
+
+
+cdef class PIDControllerC:
+    cdef public double kp, ki, kd, i_max, out_max
+    cdef public double integral, prev_error, last_output
+    cdef double _bi, _bd, _cached_dt
+
+    def __init__(self, params):
+        self.kp = params.kp
+        self.ki = params.ki
+        self.kd = params.kd
+        self.i_max = params.i_max
+        self.out_max = params.out_max
+        self.integral = 0.0
+        self.prev_error = 0.0
+        self.last_output = 0.0
+        self._bi = 0.0
+        self._bd = 0.0
+        self._cached_dt = -1.0
+
+    cpdef reset(self):
+        """Reset the integral and previous error"""
+        self.integral = 0.0
+        self.prev_error = 0.0
+        self.last_output = 0.0
+
+    cpdef double update(self, double error, double dt):
+        """Update the PID controller with the given error and time step.
+
+        Unlike the Python class, dt is mandatory: there is no auto-dt mode
+        in the compiled tick.
+        """
+        return self._tick(error, dt)
+
+    cdef double _tick(self, double error, double dt) nogil:
+        cdef double integral, output
+
+        # Limit dt to reasonable bounds
+        dt = max(min(dt, 0.1), 0.001)
+
+        # Incremental form, same as controller.PIDController
+        if dt != self._cached_dt:
+            self._bi = self.ki * dt
+            self._bd = self.kd / dt
+            self._cached_dt = dt
+
+        # Limit integral term (already scaled by ki*dt, clamped to i_max)
+        integral = self.integral + self._bi * error
+        if integral > self.i_max:
+            integral = self.i_max
+        elif integral < -self.i_max:
+            integral = -self.i_max
+        self.integral = integral
+
+        output = self.kp * error + integral + self._bd * (error - self.prev_error)
+        if output > self.out_max:
+            output = self.out_max
+        elif output < -self.out_max:
+            output = -self.out_max
+
+        self.prev_error = error
+        self.last_output = output
+
+        return output
+
+    cpdef batch_update(self, double[:] errors, double[:] out, double dt):
+        """Apply a whole time series of error samples in one compiled loop"""
+        cdef Py_ssize_t i
+        with nogil:
+            for i in range(errors.shape[0]):
+                out[i] = self._tick(errors[i], dt)
+
+    def debug(self) -> dict:
+        return {
+            'integral': self.integral,
+            'prev_err': self.prev_error,
+            'output': self.last_output
+        }
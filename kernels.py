@@ -0,0 +1,134 @@
+import numpy as np
+
+# numba is optional: when present the hot loops below are compiled to native
+# code, otherwise they run as plain Python/NumPy with identical results.
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+
+        def wrap(func):
+            return func
+        return wrap
+
+
+@njit(cache=True, fastmath=True)
+def vpid_update(kp, ki, kd, i_max, out_max, integral, prev_error,
+                errors, dt, out):
+    """One fused PID tick over N axes, mutating state buffers in place.
+
+    All arguments are length-N float64 arrays except dt. Clamps use scalar
+    min/max branches so the whole tick compiles to straight-line native code.
+    """
+    for i in range(errors.shape[0]):
+        acc = integral[i] + errors[i] * dt
+        if acc > i_max[i]:
+            acc = i_max[i]
+        elif acc < -i_max[i]:
+            acc = -i_max[i]
+        integral[i] = acc
+
+        derivative = (errors[i] - prev_error[i]) / dt
+
+        output = kp[i] * errors[i] + ki[i] * acc + kd[i] * derivative
+        if output > out_max[i]:
+            output = out_max[i]
+        elif output < -out_max[i]:
+            output = -out_max[i]
+
+        out[i] = output
+        prev_error[i] = errors[i]
+
+
+@njit(cache=True, fastmath=True)
+def quad_sim_tick(pos, att, target_pos, target_att,
+                  pos_kp, pos_ki, pos_kd, pos_i_max, pos_out_max,
+                  pos_integral, pos_prev_err, pos_err, pos_out,
+                  att_kp, att_ki, att_kd, att_i_max, att_out_max,
+                  att_integral, att_prev_err, att_err, att_out,
+                  dt, motor_out):
+    """One fused simulation tick: both PID loops, mixer and plant advance.
+
+    Mirrors QuadcopterPID.update followed by the simplified first-order
+    plant model, with every input/output/state array preallocated by the
+    caller. pos and att are advanced in place.
+    """
+    # Limit dt to reasonable bounds, as VectorPID.update does
+    dt = max(min(dt, 0.1), 0.001)
+
+    # Position control (outer loop)
+    for i in range(3):
+        pos_err[i] = target_pos[i] - pos[i]
+    vpid_update(pos_kp, pos_ki, pos_kd, pos_i_max, pos_out_max,
+                pos_integral, pos_prev_err, pos_err, dt, pos_out)
+
+    # Position outputs -> attitude setpoints
+    att_err[0] = min(max(pos_out[1] * 0.1, -30.0), 30.0) - att[0]  # roll
+    att_err[1] = min(max(pos_out[0] * 0.1, -30.0), 30.0) - att[1]  # pitch
+    att_err[2] = target_att[2] - att[2]                            # yaw
+
+    # Attitude control (inner loop)
+    vpid_update(att_kp, att_ki, att_kd, att_i_max, att_out_max,
+                att_integral, att_prev_err, att_err, dt, att_out)
+
+    # X-frame mixer, same normalization as _calculate_motor_outputs
+    base = min(max(pos_out[2] + 0.5, 0.0), 1.0)
+    r = att_out[0] / 45.0
+    p = att_out[1] / 45.0
+    y = att_out[2] / 60.0
+    motor_out[0] = min(max(base + p - r + y, 0.0), 1.0)  # 前左
+    motor_out[1] = min(max(base + p + r - y, 0.0), 1.0)  # 前右
+    motor_out[2] = min(max(base - p + r + y, 0.0), 1.0)  # 后右
+    motor_out[3] = min(max(base - p - r - y, 0.0), 1.0)  # 后左
+
+    # Simplified first-order plant response
+    for i in range(3):
+        pos[i] += (target_pos[i] - pos[i]) * 0.1 * dt
+        att[i] += (target_att[i] - att[i]) * 0.2 * dt
+
+
+@njit(cache=True, fastmath=True)
+def mass_spring_pid_loop(kp, ki, kd, i_max, out_max, target, m, b, k, dt,
+                         positions, controls, errors):
+    """Run the full PID + mass-spring-damper simulation in one compiled loop.
+
+    Plant: m*x'' + b*x' + k*x = u, integrated semi-implicitly. Results are
+    written into the preallocated positions/controls/errors buffers.
+    """
+    x = 0.0
+    v = 0.0
+    integral = 0.0
+    prev_error = 0.0
+    inv_m = 1.0 / m
+
+    for i in range(positions.shape[0]):
+        error = target - x
+
+        # PID tick (saturated integral, derivative on error, clamped output)
+        integral += error * dt
+        if integral > i_max:
+            integral = i_max
+        elif integral < -i_max:
+            integral = -i_max
+
+        derivative = (error - prev_error) / dt
+        control = kp * error + ki * integral + kd * derivative
+        if control > out_max:
+            control = out_max
+        elif control < -out_max:
+            control = -out_max
+        prev_error = error
+
+        # Plant response
+        a = (control - b * v - k * x) * inv_m
+        v = v + a * dt
+        x = x + v * dt
+
+        positions[i] = x
+        controls[i] = control
+        errors[i] = error
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class PIDParams:
     kp: float = 0.0      # Proportional gain
     ki: float = 0.0      # Integral gain
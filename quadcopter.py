@@ -1,49 +1,69 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 from typing import Tuple, Optional
 
-from controller import PIDController
+from controller import VectorPID
 from params import PIDParams
 
 
 
 class QuadcopterPID:
-    def __init__(self):
+    def __init__(self, max_steps: int = 2000):
         # Init state: position, attitude, targets and history
-        
-        # Define position control PID (x, y, z)
-        self.pos_pid = {
-            'x': PIDController(PIDParams(kp=1.0, ki=0.1, kd=0.5, out_max=10.0)),
-            'y': PIDController(PIDParams(kp=1.0, ki=0.1, kd=0.5, out_max=10.0)),
-            'z': PIDController(PIDParams(kp=2.0, ki=0.2, kd=0.8, out_max=15.0))
-        }
-        
-        # Define attitude control PID (roll, pitch, yaw)
-        self.att_pid = {
-            'roll': PIDController(PIDParams(kp=2.0, ki=0.5, kd=0.3, out_max=45.0)),
-            'pitch': PIDController(PIDParams(kp=2.0, ki=0.5, kd=0.3, out_max=45.0)),
-            'yaw': PIDController(PIDParams(kp=1.5, ki=0.3, kd=0.2, out_max=60.0))
-        }
-        
+
+        # Define position control PID, one vectorized controller for (x, y, z)
+        self.pos_pid = VectorPID(kp=[1.0, 1.0, 2.0],
+                                 ki=[0.1, 0.1, 0.2],
+                                 kd=[0.5, 0.5, 0.8],
+                                 i_max=[10.0, 10.0, 10.0],
+                                 out_max=[10.0, 10.0, 15.0])
+
+        # Define attitude control PID, one vectorized controller for (roll, pitch, yaw)
+        self.att_pid = VectorPID(kp=[2.0, 2.0, 1.5],
+                                 ki=[0.5, 0.5, 0.3],
+                                 kd=[0.3, 0.3, 0.2],
+                                 i_max=[10.0, 10.0, 10.0],
+                                 out_max=[45.0, 45.0, 60.0])
+        
+        # X模式电机混控矩阵：行对应 [前左, 前右, 后右, 后左]，
+        # 列对应 [油门, 俯仰, 滚转, 偏航] 的贡献符号
+        self._mix = np.array([[1.0,  1.0, -1.0,  1.0],
+                              [1.0,  1.0,  1.0, -1.0],
+                              [1.0, -1.0,  1.0,  1.0],
+                              [1.0, -1.0, -1.0, -1.0]])
+        # Normalization for [throttle, pitch/45, roll/45, yaw/60]
+        self._norm = np.array([1.0, 1.0 / 45.0, 1.0 / 45.0, 1.0 / 60.0])
+
         # Define target states: position and attitude
         self.target_position = np.array([0.0, 0.0, 0.0])  # [x, y, z]
         self.target_attitude = np.array([0.0, 0.0, 0.0])  # [roll, pitch, yaw]
-        
-        # Data history states for analysis and visualization
-        self.history = {
-            'time': [],
-            'position': [],
-            'attitude': [],
-            'target_pos': [],
-            'target_att': [],
-            'motor_outputs': []
-        }
+
+        # Scratch buffers reused every tick so update() allocates nothing
+        self._pos_err = np.empty(3)
+        self._att_err = np.empty(3)
+        self._att_target = np.empty(3)
+        self._mix_u = np.empty(4)
+        self._motor_buf = np.empty(4)
+        
+        # Data history for analysis and visualization, stored as preallocated
+        # Structure-of-Arrays buffers with a write cursor so every tick is a
+        # contiguous in-place store instead of a list append + copy
+        self._pos_hist = np.empty((max_steps, 3))
+        self._att_hist = np.empty((max_steps, 3))
+        self._tgt_pos_hist = np.empty((max_steps, 3))
+        self._tgt_att_hist = np.empty((max_steps, 3))
+        self._mot_hist = np.empty((max_steps, 4))
+        self._time_hist = np.empty(max_steps)
+        self._n = 0
+        self._t = 0.0  # running simulation time of the next sample
         
     def set_target_position(self, x: float, y: float, z: float):
-        self.target_position = np.array([x, y, z])
-    
+        self.target_position[:] = (x, y, z)
+
     def set_target_attitude(self, roll: float, pitch: float, yaw: float):
-        self.target_attitude = np.array([roll, pitch, yaw])
+        self.target_attitude[:] = (roll, pitch, yaw)
     
     def update(self, current_pos: np.ndarray, current_att: np.ndarray, 
                dt: float = 0.01) -> Tuple[np.ndarray, dict]:
@@ -59,43 +79,39 @@ class QuadcopterPID:
             motor_outputs: 四个电机的输出 [0-1]
             debug_info: 调试信息
         """
-        # Position control (outer loop)
-        pos_errors = self.target_position - current_pos
-        pos_outputs = {}
-        
-        for i, axis in enumerate(['x', 'y', 'z']):
-            pos_outputs[axis] = self.pos_pid[axis].update(pos_errors[i], dt)
-        
+        # Position control (outer loop), all three axes in one vectorized tick
+        pos_errors = np.subtract(self.target_position, current_pos,
+                                 out=self._pos_err)
+        pos_outputs = self.pos_pid.update(pos_errors, dt)
+
         # 将位置控制输出转换为姿态设定点
         # 注意：真实物理系统系统中这里会有更复杂的转换
         # todo: Use a more accurate model for position to attitude conversion
-        attitude_target = np.array([
-            np.clip(pos_outputs['y'] * 0.1, -30, 30),  # roll
-            np.clip(pos_outputs['x'] * 0.1, -30, 30),  # pitch
-            self.target_attitude[2]                     # yaw
-        ])
-        
-        # Attitude control (inner loop)
-        att_errors = attitude_target - current_att
-        att_outputs = {}
-        
-        for i, axis in enumerate(['roll', 'pitch', 'yaw']):
-            att_outputs[axis] = self.att_pid[axis].update(att_errors[i], dt)
-        
+        attitude_target = self._att_target
+        attitude_target[0] = min(max(pos_outputs[1] * 0.1, -30.0), 30.0)  # roll
+        attitude_target[1] = min(max(pos_outputs[0] * 0.1, -30.0), 30.0)  # pitch
+        attitude_target[2] = self.target_attitude[2]                      # yaw
+
+        # Attitude control (inner loop), vectorized as well
+        att_errors = np.subtract(attitude_target, current_att,
+                                 out=self._att_err)
+        att_outputs = self.att_pid.update(att_errors, dt)
+
         # 转换为电机输出（简化模型）
         # 四旋翼X模式配置
         # todo: 实际上需要根据具体的动力学模型进行计算
         motor_outputs = self._calculate_motor_outputs(
-            att_outputs['roll'], 
-            att_outputs['pitch'], 
-            att_outputs['yaw'],
-            pos_outputs['z']
+            att_outputs[0],
+            att_outputs[1],
+            att_outputs[2],
+            pos_outputs[2]
         )
-        
+
         # Record data for analysis
         self._record_data(dt, current_pos, current_att, motor_outputs)
-        
-        # Debug info
+
+        # Debug info: per-axis values are positional arrays,
+        # [x, y, z] for position and [roll, pitch, yaw] for attitude
         debug_info = {
             'pos_errors': pos_errors,
             'att_errors': att_errors,
@@ -111,49 +127,64 @@ class QuadcopterPID:
         """
         计算电机输出（简化模型）
         电机顺序：[前左, 前右, 后右, 后左]
+
+        返回的是每个tick复用的缓冲区；历史记录在存储时已复制。
         """
-        # 基础油门
-        base_throttle = np.clip(throttle + 0.5, 0.0, 1.0)
-        
-        # Normalize control outputs to [0, 1]
-        roll_out = roll_out / 45.0  # 假设最大滚转控制输出为45度
-        pitch_out = pitch_out / 45.0  # 假设最大俯仰控制输出为45度
-        yaw_out = yaw_out / 60.0  # 假设最大偏航控制输出为60度
-        
-        # 电机混控（X模式）
-        motor1 = base_throttle + pitch_out - roll_out + yaw_out  # 前左
-        motor2 = base_throttle + pitch_out + roll_out - yaw_out  # 前右
-        motor3 = base_throttle - pitch_out + roll_out + yaw_out  # 后右
-        motor4 = base_throttle - pitch_out - roll_out - yaw_out  # 后左
-        
-        outputs = np.array([motor1, motor2, motor3, motor4])
-        
+        # Control vector [base throttle, pitch, roll, yaw] normalized by the
+        # assumed maximum outputs (45/45/60 度) folded into self._norm
+        u = self._mix_u
+        u[0] = throttle + 0.5
+        u[1] = pitch_out
+        u[2] = roll_out
+        u[3] = yaw_out
+        u *= self._norm
+
+        # 基础油门限幅
+        u[0] = min(max(u[0], 0.0), 1.0)
+
+        # 电机混控（X模式）：one matrix-vector product instead of four
+        # scalar mixing expressions
+        outputs = np.dot(self._mix, u, out=self._motor_buf)
+
         # Normalize to [0, 1]
-        outputs = np.clip(outputs, 0.0, 1.0)
-        
+        np.clip(outputs, 0.0, 1.0, out=outputs)
+
         return outputs
     
-    def _record_data(self, dt: float, current_pos: np.ndarray, 
+    def _record_data(self, dt: float, current_pos: np.ndarray,
                      current_att: np.ndarray, motor_outputs: np.ndarray):
-        if not self.history['time']:
-            self.history['time'].append(0)
-        else:
-            self.history['time'].append(self.history['time'][-1] + dt)
-        
-        self.history['position'].append(current_pos.copy())
-        self.history['attitude'].append(current_att.copy())
-        self.history['target_pos'].append(self.target_position.copy())
-        self.history['target_att'].append(self.target_attitude.copy())
-        self.history['motor_outputs'].append(motor_outputs.copy())
+        if self._n == len(self._time_hist):
+            self._grow_history()
+
+        i = self._n
+        self._time_hist[i] = self._t
+        self._t += dt
+        self._pos_hist[i] = current_pos
+        self._att_hist[i] = current_att
+        self._tgt_pos_hist[i] = self.target_position
+        self._tgt_att_hist[i] = self.target_attitude
+        self._mot_hist[i] = motor_outputs
+        self._n = i + 1
+
+    def _grow_history(self):
+        """Double the history capacity once the write cursor hits the end"""
+        for name in ('_pos_hist', '_att_hist', '_tgt_pos_hist',
+                     '_tgt_att_hist', '_mot_hist', '_time_hist'):
+            buf = getattr(self, name)
+            setattr(self, name, np.concatenate((buf, np.empty_like(buf))))
     
-    def plot_results(self):
-        time_data = self.history['time']
-        
+    def plot_results(self, max_points: int = 500):
+        n = self._n
+        # Decimate long runs so each curve carries at most ~max_points
+        # vertices; matplotlib cost scales with vertex count, not run length
+        stride = max(1, n // max_points)
+        time_data = self._time_hist[:n:stride]
+
         fig, axes = plt.subplots(3, 2, figsize=(12, 10))
-        
+
         # 位置跟踪
-        positions = np.array(self.history['position'])
-        target_positions = np.array(self.history['target_pos'])
+        positions = self._pos_hist[:n:stride]
+        target_positions = self._tgt_pos_hist[:n:stride]
         
         axes[0, 0].plot(time_data, positions[:, 0], 'b-', label='Actual X')
         axes[0, 0].plot(time_data, target_positions[:, 0], 'r--', label='Target X')
@@ -175,8 +206,8 @@ class QuadcopterPID:
         axes[2, 0].grid(True)
         
         # 姿态跟踪
-        attitudes = np.array(self.history['attitude'])
-        target_attitudes = np.array(self.history['target_att'])
+        attitudes = self._att_hist[:n:stride]
+        target_attitudes = self._tgt_att_hist[:n:stride]
         
         axes[0, 1].plot(time_data, attitudes[:, 0], 'b-', label='Actual Roll')
         axes[0, 1].plot(time_data, target_attitudes[:, 0], 'r--', label='Target Roll')
@@ -200,21 +231,28 @@ class QuadcopterPID:
         plt.tight_layout()
         plt.show()
         
-        # 电机输出
+        # 电机输出：all four traces batched into one LineCollection
         fig2, ax2 = plt.subplots(figsize=(10, 6))
-        motor_outputs = np.array(self.history['motor_outputs'])
-        
-        ax2.plot(time_data, motor_outputs[:, 0], label='Motor 1 (Front Left)')
-        ax2.plot(time_data, motor_outputs[:, 1], label='Motor 2 (Front Right)')
-        ax2.plot(time_data, motor_outputs[:, 3], label='Motor 3 (Rear Left)')
-        ax2.plot(time_data, motor_outputs[:, 2], label='Motor 4 (Rear Right)')
+        motor_outputs = self._mot_hist[:n:stride]
+
+        motor_series = [(0, 'Motor 1 (Front Left)'),
+                        (1, 'Motor 2 (Front Right)'),
+                        (3, 'Motor 3 (Rear Left)'),
+                        (2, 'Motor 4 (Rear Right)')]
+        colors = [f'C{i}' for i in range(len(motor_series))]
+        segments = [np.column_stack((time_data, motor_outputs[:, col]))
+                    for col, _ in motor_series]
+        ax2.add_collection(LineCollection(segments, colors=colors))
+        ax2.legend(handles=[Line2D([], [], color=c, label=label)
+                            for c, (_, label) in zip(colors, motor_series)])
+        ax2.autoscale()
         ax2.set_xlabel('Time (sec)')
         ax2.set_ylabel('Motor Output [0-1]')
         ax2.set_title('Motor Outputs Over Time')
-        ax2.legend()
         ax2.grid(True)
         plt.show()
     
     def reset_history(self):
-        for key in self.history:
-            self.history[key] = []
+        # Buffers are reused as-is, rewinding the cursor is enough
+        self._n = 0
+        self._t = 0.0
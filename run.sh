@@ -153,7 +153,7 @@ install_dependencies() {
     
     # Install basic dependencies
     log_info "Installing basic dependencies..."
-    pip install numpy matplotlib scipy
+    pip install numpy matplotlib scipy numba
 
     # Install dependencies from requirements.txt
     if [ -f "requirements.txt" ]; then
@@ -0,0 +1,11 @@
+"""Build script for the optional Cython PID extension.
+
+Usage: python setup_fast.py build_ext --inplace
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='controller_fast',
+    ext_modules=cythonize('controller_fast.pyx'),
+)
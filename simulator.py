@@ -4,9 +4,16 @@ import matplotlib.pyplot as plt
 
 from tuner import PIDTuner
 from params import PIDParams
-from controller import PIDController
+from kernels import mass_spring_pid_loop, quad_sim_tick
 from quadcopter import QuadcopterPID
 
+# scipy is optional: without it the manual-tuning demo always uses the
+# step-by-step kernel instead of the batched LTI solve
+try:
+    from scipy.signal import dlsim
+except ImportError:
+    dlsim = None
+
 def simulate_quadcopter():
     """模拟四旋翼无人机控制"""
     print("四旋翼无人机PID控制器模拟")
@@ -35,25 +42,37 @@ def simulate_quadcopter():
     print(f"\n开始模拟: {simulation_time}秒, {steps}步, {1/dt}Hz")
     print("=" * 50)
     
+    # 控制 + 简化一阶动力学全部融合在一个编译内核里，
+    # Python层只负责目标切换、历史记录和进度打印
+    pos_pid, att_pid = quadcopter.pos_pid, quadcopter.att_pid
     for step in range(steps):
-        # 更新控制
-        motor_outputs, debug_info = quadcopter.update(current_pos, current_att, dt)
-        
-        # 简化的无人机动力学模型（用于演示）
-        pos_error = quadcopter.target_position - current_pos
-        att_error = quadcopter.target_attitude - current_att
-        
-        # 模拟无人机响应（简化的一阶模型）
-        current_pos += pos_error * 0.1 * dt
-        current_att += att_error * 0.2 * dt
-        
+        # 先记录本tick控制器看到的状态（内核会就地推进状态），
+        # 电机输出行在内核算完后回填
+        hist_i = quadcopter._n
+        quadcopter._record_data(dt, current_pos, current_att,
+                                quadcopter._motor_buf)
+
+        # 更新控制并推进被控对象状态（就地修改 current_pos/current_att）
+        quad_sim_tick(current_pos, current_att,
+                      quadcopter.target_position, quadcopter.target_attitude,
+                      pos_pid.kp, pos_pid.ki, pos_pid.kd,
+                      pos_pid.i_max, pos_pid.out_max,
+                      pos_pid.integral, pos_pid.prev_error,
+                      quadcopter._pos_err, pos_pid.last_output,
+                      att_pid.kp, att_pid.ki, att_pid.kd,
+                      att_pid.i_max, att_pid.out_max,
+                      att_pid.integral, att_pid.prev_error,
+                      quadcopter._att_err, att_pid.last_output,
+                      dt, quadcopter._motor_buf)
+        quadcopter._mot_hist[hist_i] = quadcopter._motor_buf
+
         # 添加一些噪声（模拟传感器噪声）
         if step > 100:  # 稳定后添加目标变化
             if step == 200:
                 quadcopter.set_target_position(2, 1, 5)  # 移动到新位置
             elif step == 400:
                 quadcopter.set_target_attitude(10, 5, 20)  # 改变姿态
-        
+
         # 打印进度
         if step % 100 == 0:
             print(
@@ -67,65 +86,87 @@ def simulate_quadcopter():
     
     return quadcopter
 
+def _linear_pid_response(params, target, m, b, k, dt, steps):
+    """尝试把 PID + 质量-弹簧-阻尼闭环当作离散LTI系统一次性求解
+
+    PID加被控对象在未饱和时是线性时不变的，因此整条轨迹可以交给
+    scipy.signal.dlsim 的一次状态空间仿真，而不用逐步迭代。状态为
+    [x, v, ∫e, e_prev]，输入为常值目标。若任一时刻触发积分限幅或
+    输出限幅（进入非线性区），返回 None，由调用方退回逐步内核。
+    """
+    if dlsim is None:
+        return None
+
+    bd = params.kd / dt
+    # Combined error gain: kp*e + ki*(I + dt*e) + bd*(e - e_prev)
+    c = params.kp + params.ki * dt + bd
+
+    # State transition for z = [x, v, integral, prev_error], input r
+    row_v = np.array([-(dt / m) * (c + k), 1.0 - b * dt / m,
+                      dt * params.ki / m, -dt * bd / m])
+    b_v = dt * c / m
+    a_mat = np.empty((4, 4))
+    a_mat[1] = row_v
+    a_mat[0] = np.array([1.0, 0.0, 0.0, 0.0]) + dt * row_v  # semi-implicit x
+    a_mat[2] = [-dt, 0.0, 1.0, 0.0]
+    a_mat[3] = [-1.0, 0.0, 0.0, 0.0]
+    b_mat = np.array([[dt * b_v], [b_v], [dt], [1.0]])
+    c_mat = np.eye(4)
+    d_mat = np.zeros((4, 1))
+
+    r = np.full(steps + 1, target)
+    _, _, states = dlsim((a_mat, b_mat, c_mat, d_mat, dt), u=r)
+
+    errors = target - states[:-1, 0]
+    controls = c * errors + params.ki * states[:-1, 2] - bd * states[:-1, 3]
+    positions = states[1:, 0]
+
+    # Any saturation means the linear model diverged from the real loop
+    if (np.abs(controls).max() > params.out_max or
+            np.abs(states[:, 2]).max() > params.i_max):
+        return None
+
+    return positions, controls, errors
+
+
 def manual_pid_tuning():
     """手动PID调试示例"""
     print("手动PID调试示例")
     print("=" * 50)
-    
-    # 创建一个简单的PID控制器进行调试
-    pid = PIDController(PIDParams(kp=1.2, ki=1.2, kd=0.3, out_max=10.0, i_max=5.0))
-    
-    # 模拟系统响应（简单的质量-弹簧-阻尼系统）
-    def simulate_system(control_input, state, dt):
-        # 二阶系统: m*x'' + b*x' + k*x = u
-        m, b, k = 1.0, 0.5, 2.0
-        
-        # 状态: [位置, 速度]
-        x, v = state
-        
-        # 加速度
-        a = (control_input - b*v - k*x) / m
-        
-        # 更新状态
-        v_new = v + a * dt
-        x_new = x + v_new * dt
-        
-        return np.array([x_new, v_new])
-    
+
+    # PID参数（质量-弹簧-阻尼系统: m*x'' + b*x' + k*x = u）
+    params = PIDParams(kp=1.2, ki=1.2, kd=0.3, out_max=10.0, i_max=5.0)
+    m, b, k = 1.0, 0.5, 2.0
+
     # 仿真参数
     target = 1.0  # 目标位置
-    state = np.array([0.0, 0.0])  # 初始状态 [位置, 速度]
     dt = 0.01
     time_steps = 10000
-    
+
     # 记录数据
     times = np.linspace(0, time_steps*dt, time_steps)
-    positions = np.zeros(time_steps)
-    controls = np.zeros(time_steps)
-    errors = np.zeros(time_steps)
-    
-    # 仿真循环
-    for i in range(time_steps):
-        error = target - state[0]
-        
-        # PID控制
-        control = pid.update(error, dt)
-        
-        # 系统响应
-        state = simulate_system(control, state, dt)
-        
-        # 记录
-        positions[i] = state[0]
-        controls[i] = control
-        errors[i] = error
-    
+
+    # 优先尝试批量LTI求解（仅在全程未饱和时有效）
+    result = _linear_pid_response(params, target, m, b, k, dt, time_steps)
+    if result is not None:
+        positions, controls, errors = result
+    else:
+        # 进入饱和区: PID + 系统响应在一个编译后的内核中逐步完成
+        positions = np.empty(time_steps)
+        controls = np.empty(time_steps)
+        errors = np.empty(time_steps)
+        mass_spring_pid_loop(params.kp, params.ki, params.kd,
+                             params.i_max, params.out_max,
+                             target, m, b, k, dt,
+                             positions, controls, errors)
+
     # 绘制响应曲线
     fig, axes = plt.subplots(2, 1, figsize=(10, 8))
     
     axes[0].plot(times, positions, 'b-', label='Position Response')
     axes[0].axhline(y=target, color='r', linestyle='--', label='Target Value')
     axes[0].set_ylabel('Position')
-    axes[0].set_title(f'PID Response (Kp={pid.params.kp}, Ki={pid.params.ki}, Kd={pid.params.kd})')
+    axes[0].set_title(f'PID Response (Kp={params.kp}, Ki={params.ki}, Kd={params.kd})')
     axes[0].legend()
     axes[0].grid(True)
     
@@ -141,15 +182,14 @@ def manual_pid_tuning():
     
     # 计算性能指标
     steady_state_error = errors[-100:].mean()
-    overshoot = max(positions) - target if max(positions) > target else 0
-    settling_time = None
-    
+    peak = positions.max()
+    overshoot = peak - target if peak > target else 0
+
     # 找到稳定时间（进入2%误差带的时间）
     tolerance = 0.02 * target
-    for i, pos in enumerate(positions):
-        if abs(pos - target) <= tolerance:
-            settling_time = times[i]
-            break
+    in_band = np.abs(positions - target) <= tolerance
+    first_in = np.argmax(in_band)
+    settling_time = times[first_in] if in_band[first_in] else None
     
     print("系统性能分析:")
     print(f"  稳态误差: {steady_state_error:.2f}")
@@ -1,54 +1,98 @@
+import itertools
+import os
+from multiprocessing import Pool
+
 import numpy as np
 import matplotlib.pyplot as plt
 
+from kernels import mass_spring_pid_loop
 from quadcopter import QuadcopterPID
 
 
+# Benchmark plant used to score candidate gains (same second-order
+# mass-spring-damper system as the manual tuning demo)
+_SCORE_M, _SCORE_B, _SCORE_K = 1.0, 0.5, 2.0
+_SCORE_TARGET = 1.0
+_SCORE_DT = 0.01
+_SCORE_STEPS = 2000
+_SCORE_I_MAX = 5.0
+_SCORE_OUT_MAX = 10.0
+
+# 各场景的搜索中心（沿用原先的建议初始参数）
+_SCENARIO_CENTERS = {
+    'hover': (2.0, 0.2, 0.8),
+    'step': (1.5, 0.1, 0.5),
+    'tracking': (1.2, 0.15, 0.6),
+}
+
+
+def _score_gains(gains):
+    """用候选 (kp, ki, kd) 在基准系统上跑一次完整仿真，返回RMS误差
+
+    Module-level so multiprocessing can pickle it; the simulation itself
+    runs inside the compiled mass_spring_pid_loop kernel.
+    """
+    kp, ki, kd = gains
+    positions = np.empty(_SCORE_STEPS)
+    controls = np.empty(_SCORE_STEPS)
+    errors = np.empty(_SCORE_STEPS)
+    mass_spring_pid_loop(kp, ki, kd, _SCORE_I_MAX, _SCORE_OUT_MAX,
+                         _SCORE_TARGET, _SCORE_M, _SCORE_B, _SCORE_K,
+                         _SCORE_DT, positions, controls, errors)
+    return float(np.sqrt(np.mean(errors ** 2)))
+
 
 class PIDTuner:
     """PID参数调试工具"""
-    
+
     @staticmethod
     def tune_parameters(controller: QuadcopterPID, scenario: str = "tracking"):
         """
-        自动调试PID参数
-        
+        自动调试PID参数：以场景建议值为中心做并行网格搜索
+
+        每个候选 (kp, ki, kd) 独立仿真打分（天然并行），用进程池分摊到
+        全部CPU核。最优增益写回controller的Z轴位置PID。
+
         参数:
             controller: QuadcopterPID实例
-            test_scenario: 测试场景 ("hover", "step", "tracking")
+            scenario: 测试场景 ("hover", "step", "tracking")
         """
         print("开始PID参数调试...")
         print("=" * 50)
-        
-        if scenario == "hover":
-            print("调试场景: 悬停")
-            print("建议初始参数:")
-            print("  Z轴: kp=2.0, ki=0.2, kd=0.8")
-            print("  姿态: kp=2.0, ki=0.5, kd=0.3")
-        
-        elif scenario == "step":
-            print("调试场景: 阶跃响应")
-            print("建议初始参数:")
-            print("  位置: kp=1.5, ki=0.1, kd=0.5")
-            print("  姿态: kp=2.5, ki=0.3, kd=0.4")
-        
-        elif scenario == "tracking":
-            print("调试场景: 轨迹跟踪")
-            print("建议初始参数:")
-            print("  位置: kp=1.2, ki=0.15, kd=0.6")
-            print("  姿态: kp=2.0, ki=0.4, kd=0.35")
-        
+        print(f"调试场景: {scenario}")
+
+        kp0, ki0, kd0 = _SCENARIO_CENTERS.get(scenario,
+                                              _SCENARIO_CENTERS['tracking'])
+        scales = np.array([0.5, 1.0, 1.5, 2.0])
+        gains = list(itertools.product(kp0 * scales, ki0 * scales,
+                                       kd0 * scales))
+
+        print(f"网格搜索 {len(gains)} 组候选增益 "
+              f"({os.cpu_count()} 个工作进程)...")
+        with Pool(os.cpu_count()) as pool:
+            scores = pool.map(_score_gains, gains)
+
+        best_kp, best_ki, best_kd = gains[int(np.argmin(scores))]
+        print(f"最优增益: kp={best_kp:.3f}, ki={best_ki:.3f}, "
+              f"kd={best_kd:.3f} (RMS误差 {min(scores):.4f})")
+
+        # 应用到Z轴位置PID（悬停/阶跃场景的主导轴）
+        controller.pos_pid.kp[2] = best_kp
+        controller.pos_pid.ki[2] = best_ki
+        controller.pos_pid.kd[2] = best_kd
+
         print("=" * 50)
     
     @staticmethod
     def analyze_performance(controller: QuadcopterPID):
         """分析控制性能"""
-        positions = np.array(controller.history['position'])
-        targets = np.array(controller.history['target_pos'])
-        
-        if len(positions) == 0:
+        n = controller._n
+        if n == 0:
             print("没有数据可供分析")
             return
+
+        positions = controller._pos_hist[:n]
+        targets = controller._tgt_pos_hist[:n]
         
         # 计算误差统计
         errors = targets - positions